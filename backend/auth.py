@@ -40,7 +40,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     )
     return encoded_jwt
 
-async def get_current_user(
+def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: Session = Depends(get_db)
 ) -> models.User:
@@ -66,7 +66,7 @@ async def get_current_user(
         raise credentials_exception
     return user
 
-async def get_current_active_user(
+def get_current_active_user(
     current_user: models.User = Depends(get_current_user)
 ) -> models.User:
     if not current_user.is_active:
@@ -0,0 +1,337 @@
+"""
+Query-plan regression harness for the crud read paths.
+
+Builds (or reuses) a large synthetic dataset, runs get_jobs, get_job,
+get_job_notes and get_user_by_email with representative arguments, and
+checks every statement they emit:
+
+- its plan must not scan a whole table or index (only SEARCH steps pass,
+  unless the case is listed in ALLOWED_SCANS)
+- the call's median time must stay within the budget recorded in
+  query_plan_budgets.json
+
+A text search has to read every job of the user it searches, so the
+search case is bounded by that user's job count, not by an index.
+
+The list cases run both with every column and with the job list route's
+default fields (no description, notes loaded), and a share of the closed,
+old jobs is moved into the archive tables so include_archived reads both.
+
+Exits non-zero on any regression, so it can run as a CI gate. Run from the
+repository root:
+
+    python -m backend.benchmarks.query_plans
+    python -m backend.benchmarks.query_plans --record   # re-record budgets
+"""
+import argparse
+import bisect
+import itertools
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import event, func, insert, text
+from sqlalchemy.orm import sessionmaker
+
+from .. import crud, models
+from ..config import settings
+from ..database import create_db_engine
+from ..routes import JOB_LIST_DEFAULT_FIELDS
+
+BUDGETS_PATH = os.path.join(os.path.dirname(__file__), "query_plan_budgets.json")
+
+STATUSES = ["applied", "rejected", "interview", "offer", "withdrawn"]
+STATUS_WEIGHTS = [55, 30, 10, 3, 2]
+TITLES = [
+    "Software Engineer", "Senior Software Engineer", "Data Scientist", "Product Manager",
+    "Backend Engineer", "Frontend Engineer", "DevOps Engineer", "Engineering Manager",
+    "QA Engineer", "Data Engineer", "Site Reliability Engineer", "Designer",
+]
+INSERT_CHUNK = 20000
+
+# Full scans a case is allowed to make, as {case name: {table, ...}}. Every
+# entry should say why the scan is acceptable
+ALLOWED_SCANS = {}
+
+def _zipf_cdf(n: int, s: float):
+    weights = list(itertools.accumulate(1 / (k ** s) for k in range(1, n + 1)))
+    total = weights[-1]
+    return [w / total for w in weights]
+
+def _zipf_pick(rng: random.Random, cdf) -> int:
+    return bisect.bisect_left(cdf, rng.random())
+
+def generate_dataset(
+    engine, users: int, jobs: int, companies: int, notes_per_job: float, archive_share: float, seed: int
+):
+    """
+    Insert a skewed dataset through the models' tables: job ownership and
+    company choice follow Zipf distributions, so a few users own a large
+    share of all jobs, as in production. archive_share of the jobs the
+    archive sweep would move (closed status, older than ARCHIVE_AFTER_DAYS)
+    go to the archive tables instead, as if the sweep had run.
+    """
+    rng = random.Random(seed)
+    models.Base.metadata.drop_all(bind=engine)
+    models.Base.metadata.create_all(bind=engine)
+
+    owner_cdf = _zipf_cdf(users, 1.1)
+    company_cdf = _zipf_cdf(companies, 1.2)
+    now = datetime.now(timezone.utc)
+    archive_before = now - timedelta(days=settings.ARCHIVE_AFTER_DAYS)
+
+    with engine.begin() as conn:
+        conn.execute(insert(models.User), [
+            {"id": i + 1, "email": f"user{i + 1}@example.com", "hashed_password": "x", "is_active": True}
+            for i in range(users)
+        ])
+
+    job_id = 0
+    note_id = 0
+    while job_id < jobs:
+        job_rows = []
+        note_rows = []
+        archived_rows = []
+        archived_note_rows = []
+        for _ in range(min(INSERT_CHUNK, jobs - job_id)):
+            job_id += 1
+            created = now - timedelta(minutes=rng.randrange(3 * 365 * 24 * 60))
+            row = {
+                "id": job_id,
+                "title": rng.choice(TITLES),
+                "company": f"Company {_zipf_pick(rng, company_cdf)}",
+                "location": "Remote",
+                "description": "Synthetic job description " * rng.randrange(1, 20),
+                "status": rng.choices(STATUSES, STATUS_WEIGHTS)[0],
+                "application_date": created,
+                "created_at": created,
+                "owner_id": _zipf_pick(rng, owner_cdf) + 1,
+            }
+            archived = (
+                row["status"] in settings.ARCHIVE_STATUSES
+                and created < archive_before
+                and rng.random() < archive_share
+            )
+            if archived:
+                archived_rows.append({**row, "archived_at": now})
+            else:
+                job_rows.append(row)
+            while rng.random() < notes_per_job / (1 + notes_per_job):
+                note_id += 1
+                (archived_note_rows if archived else note_rows).append({
+                    "id": note_id,
+                    "content": "Synthetic note",
+                    "created_at": created,
+                    "job_id": job_id,
+                })
+        with engine.begin() as conn:
+            for model, rows in (
+                (models.Job, job_rows),
+                (models.JobNote, note_rows),
+                (models.ArchivedJob, archived_rows),
+                (models.ArchivedJobNote, archived_note_rows),
+            ):
+                if rows:
+                    conn.execute(insert(model), rows)
+        print(f"  generated {job_id}/{jobs} jobs", end="\r", flush=True)
+    print()
+
+    # Give the planner real statistics, as a long-lived production database has
+    with engine.begin() as conn:
+        conn.execute(text("ANALYZE"))
+
+def _dataset_size(engine):
+    """Return (hot, archived) job counts, or (0, 0) if there is no dataset."""
+    try:
+        with engine.connect() as conn:
+            return (
+                conn.execute(func.count(models.Job.id).select()).scalar(),
+                conn.execute(func.count(models.ArchivedJob.id).select()).scalar(),
+            )
+    except Exception:
+        return 0, 0
+
+def build_cases(db):
+    """Representative crud calls: heaviest, median and lightest users plus common filters."""
+    owners = db.query(models.Job.owner_id, func.count().label("n")).group_by(
+        models.Job.owner_id
+    ).order_by(func.count().desc()).all()
+    heavy, median, light = owners[0][0], owners[len(owners) // 2][0], owners[-1][0]
+    listed = JOB_LIST_DEFAULT_FIELDS
+    heavy_job = db.query(models.Job.id).filter(models.Job.owner_id == heavy).first()[0]
+    noted_job_id, noted_owner = db.query(models.Job.id, models.Job.owner_id).join(
+        models.JobNote, models.JobNote.job_id == models.Job.id
+    ).filter(models.Job.owner_id == heavy).first()
+    top_company = db.query(models.Job.company).filter(
+        models.Job.owner_id == heavy
+    ).group_by(models.Job.company).order_by(func.count().desc()).first()[0]
+
+    return {
+        "get_jobs[heavy]": lambda: crud.get_jobs(db, user_id=heavy),
+        "get_jobs[heavy,deep_page]": lambda: crud.get_jobs(db, user_id=heavy, skip=1000, limit=50),
+        "get_jobs[heavy,status]": lambda: crud.get_jobs(db, user_id=heavy, status="rejected"),
+        "get_jobs[heavy,company]": lambda: crud.get_jobs(db, user_id=heavy, company=top_company),
+        "get_jobs[heavy,search]": lambda: crud.get_jobs(db, user_id=heavy, search="engineer"),
+        "get_jobs[heavy,include_archived]": lambda: crud.get_jobs(db, user_id=heavy, include_archived=True),
+        "get_jobs[median]": lambda: crud.get_jobs(db, user_id=median),
+        # What GET /jobs/ runs when the client does not pass ?fields=
+        "get_jobs[heavy,list_fields]": lambda: crud.get_jobs(db, user_id=heavy, fields=listed),
+        "get_jobs[heavy,deep_page,list_fields]": lambda: crud.get_jobs(
+            db, user_id=heavy, skip=1000, limit=50, fields=listed
+        ),
+        "get_jobs[heavy,status,list_fields]": lambda: crud.get_jobs(
+            db, user_id=heavy, status="rejected", fields=listed
+        ),
+        "get_jobs[heavy,include_archived,list_fields]": lambda: crud.get_jobs(
+            db, user_id=heavy, include_archived=True, fields=listed
+        ),
+        "get_jobs[median,list_fields]": lambda: crud.get_jobs(db, user_id=median, fields=listed),
+        "get_jobs[light,status]": lambda: crud.get_jobs(db, user_id=light, status="applied"),
+        "get_job": lambda: crud.get_job(db, job_id=heavy_job, user_id=heavy),
+        "get_job[missing]": lambda: crud.get_job(db, job_id=heavy_job, user_id=light),
+        "get_job_notes": lambda: crud.get_job_notes(db, job_id=noted_job_id),
+        "get_user_by_email": lambda: crud.get_user_by_email(db, email=f"user{noted_owner}@example.com"),
+        "get_user_by_email[missing]": lambda: crud.get_user_by_email(db, email="nobody@example.com"),
+    }
+
+class StatementRecorder:
+    """Capture each statement a crud call emits, with its bound parameters."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements = []
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._record)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append((statement, parameters))
+
+def full_scans(conn, statement: str, parameters, tables) -> list:
+    """Return the tables a statement's plan reads with a full scan."""
+    scans = []
+    if conn.dialect.name == "sqlite":
+        for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters):
+            words = row[-1].split()
+            # Only "SEARCH" is an index lookup. "SCAN jobs", "SCAN jobs USING
+            # INDEX ..." and "SCAN jobs USING COVERING INDEX ..." all walk every
+            # row; SQLite before 3.36 prints "SCAN TABLE jobs"
+            if words[:1] != ["SCAN"]:
+                continue
+            names = words[2:3] if words[1:2] == ["TABLE"] else words[1:2]
+            if names and names[0] in tables:
+                scans.append(names[0])
+    else:
+        for row in conn.exec_driver_sql(f"EXPLAIN {statement}", parameters):
+            line = row[0]
+            if "Seq Scan on" in line:
+                table = line.split("Seq Scan on", 1)[1].split()[0]
+                if table in tables:
+                    scans.append(table)
+    return scans
+
+def run(engine, budgets, repeats: int):
+    tables = set(models.Base.metadata.tables)
+    session_factory = sessionmaker(autoflush=False, bind=engine)
+    results = {}
+    failures = []
+
+    with session_factory() as db:
+        cases = build_cases(db)
+        for name, call in cases.items():
+            timings = []
+            statements = []
+            for _ in range(repeats):
+                db.expire_all()
+                with StatementRecorder(engine) as recorder:
+                    started = time.perf_counter()
+                    call()
+                    timings.append((time.perf_counter() - started) * 1000)
+                statements = recorder.statements
+            elapsed = statistics.median(timings)
+            results[name] = elapsed
+
+            with engine.connect() as conn:
+                for statement, parameters in statements:
+                    for table in full_scans(conn, statement, parameters, tables):
+                        if table in ALLOWED_SCANS.get(name, ()):
+                            continue
+                        failures.append(f"{name}: full scan of {table} in: {' '.join(statement.split())}")
+
+            budget = budgets.get(name)
+            status = "ok"
+            if budget is not None and elapsed > budget:
+                status = "OVER BUDGET"
+                failures.append(f"{name}: {elapsed:.2f} ms exceeds budget of {budget:.2f} ms")
+            budget_label = f"{budget:.2f}" if budget is not None else "-"
+            print(f"  {name:<46} {elapsed:9.2f} ms  budget {budget_label:>8}  {status}")
+    return results, failures
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--database-url", default="sqlite:///./query_plan_bench.db")
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--jobs", type=int, default=2_000_000)
+    parser.add_argument("--companies", type=int, default=3000)
+    parser.add_argument("--notes-per-job", type=float, default=0.5)
+    parser.add_argument(
+        "--archive-share",
+        type=float,
+        default=0.5,
+        help="share of archivable jobs (closed and old) generated into the archive tables"
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--rebuild", action="store_true", help="regenerate the dataset even if present")
+    parser.add_argument("--record", action="store_true", help="write measured times as the new budgets")
+    parser.add_argument("--headroom", type=float, default=1.5, help="budget multiplier when recording")
+    parser.add_argument("--min-budget", type=float, default=5.0, help="smallest budget recorded, in ms")
+    args = parser.parse_args()
+
+    engine = create_db_engine(args.database_url)
+    hot, archived = _dataset_size(engine)
+    if args.rebuild or hot + archived != args.jobs or (args.archive_share > 0) != (archived > 0):
+        print(f"Generating {args.jobs} jobs across {args.users} users...")
+        started = time.perf_counter()
+        generate_dataset(
+            engine, args.users, args.jobs, args.companies, args.notes_per_job, args.archive_share, args.seed
+        )
+        print(f"  done in {time.perf_counter() - started:.1f}s")
+
+    budgets = {}
+    if os.path.exists(BUDGETS_PATH) and not args.record:
+        with open(BUDGETS_PATH) as f:
+            budgets = json.load(f)
+
+    results, failures = run(engine, budgets, args.repeats)
+    engine.dispose()
+
+    if args.record:
+        recorded = {
+            name: round(max(ms * args.headroom, args.min_budget), 2)
+            for name, ms in results.items()
+        }
+        with open(BUDGETS_PATH, "w") as f:
+            json.dump(recorded, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Recorded budgets to {BUDGETS_PATH}")
+        # A recorded run still refuses to bless a full scan
+        failures = [failure for failure in failures if "exceeds budget" not in failure]
+
+    if failures:
+        print("\nQuery plan regressions:")
+        for failure in failures:
+            print(f"  FAIL {failure}")
+        sys.exit(1)
+    print("\nAll query plans use indexes and are within budget.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Concurrent write throughput: generic engine vs. the SQLite production profile.
+
+Run from the repository root:
+
+    python -m backend.benchmarks.sqlite_writes --threads 16 --writes 200
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import QueuePool
+
+from .. import models
+from ..database import create_db_engine, session_class_for
+
+def _baseline_factory(url: str):
+    # The engine configuration database.py used before the SQLite profile
+    engine = create_engine(
+        url,
+        poolclass=QueuePool,
+        pool_size=5,
+        max_overflow=10,
+        pool_timeout=30,
+        pool_recycle=1800,
+    )
+    return engine, sessionmaker(class_=Session, autoflush=False, bind=engine)
+
+def _profile_factory(url: str):
+    engine = create_db_engine(url)
+    return engine, sessionmaker(class_=session_class_for(url), autoflush=False, bind=engine)
+
+def _run(factory, threads: int, writes: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        engine, session_factory = factory(url)
+        models.Base.metadata.create_all(bind=engine)
+
+        with session_factory() as db:
+            user = models.User(email="bench@example.com", hashed_password="x")
+            db.add(user)
+            db.commit()
+            user_id = user.id
+
+        errors = []
+        start_barrier = threading.Barrier(threads)
+
+        def worker(n: int):
+            start_barrier.wait()
+            for i in range(writes):
+                db = session_factory()
+                try:
+                    db.add(models.Job(
+                        title=f"Engineer {n}-{i}",
+                        company=f"Company {i % 50}",
+                        status="applied",
+                        owner_id=user_id,
+                    ))
+                    db.commit()
+                except OperationalError as e:
+                    db.rollback()
+                    errors.append(str(e.orig))
+                finally:
+                    db.close()
+
+        workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+        started = time.perf_counter()
+        for t in workers:
+            t.start()
+        for t in workers:
+            t.join()
+        elapsed = time.perf_counter() - started
+        engine.dispose()
+
+    committed = threads * writes - len(errors)
+    return committed, len(errors), elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--writes", type=int, default=200, help="commits per thread")
+    args = parser.parse_args()
+
+    print(f"{args.threads} threads x {args.writes} commits")
+    for name, factory in (("baseline", _baseline_factory), ("profile", _profile_factory)):
+        committed, failed, elapsed = _run(factory, args.threads, args.writes)
+        print(
+            f"{name:>8}: {committed / elapsed:8.1f} commits/s  "
+            f"committed={committed} locked_errors={failed} elapsed={elapsed:.2f}s"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import Dict, List
 import os
 from dotenv import load_dotenv
 
@@ -17,6 +17,58 @@ class Settings(BaseSettings):
     
     # Database
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./job_tracker.db")
+    SQL_ECHO: bool = False
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 1800
+    # "create_all" creates missing tables at startup (development);
+    # "check" only verifies the schema is at the migration head (set by backend.server)
+    DB_STARTUP_MODE: str = "create_all"
+    DB_WARM_CONNECTIONS: int = 0
+    WARM_STARTUP: bool = False
+    
+    # SQLite tuning (ignored for other backends)
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024
+    SQLITE_CACHE_SIZE_KB: int = 64 * 1024
+    SQLITE_SERIALIZE_WRITES: bool = True
+    
+    # Typeahead
+    SUGGEST_DEFAULT_LIMIT: int = 10
+    
+    # Idempotency keys
+    IDEMPOTENCY_TTL_SECONDS: int = 24 * 60 * 60
+    IDEMPOTENCY_WAIT_SECONDS: float = 10.0
+    IDEMPOTENCY_POLL_INTERVAL_SECONDS: float = 0.05
+    # A pending key whose request died or never recorded its response can be
+    # reclaimed after this long, independently of the replay TTL above. It
+    # must outlast the slowest live handler, so idempotency.pending_lease_seconds
+    # never goes below what the pool and writer-slot timeouts allow
+    IDEMPOTENCY_PENDING_LEASE_SECONDS: float = 120.0
+    # Share of keyed requests that also purge expired keys
+    IDEMPOTENCY_PURGE_SAMPLE_RATE: float = 0.01
+    
+    # Background tasks
+    TASK_WORKERS: int = 2
+    TASK_QUEUE_MAX: int = 100
+    TASK_TYPE_LIMITS: Dict[str, int] = {
+        "export_jobs": 2,
+        "archive_jobs": 1,
+    }
+    TASK_DRAIN_TIMEOUT_SECONDS: float = 30.0
+    # Running tasks refresh heartbeat_at this often; one whose heartbeat is
+    # older than the lease is requeued (or failed after TASK_MAX_ATTEMPTS)
+    TASK_HEARTBEAT_SECONDS: float = 15.0
+    TASK_LEASE_SECONDS: float = 120.0
+    TASK_MAX_ATTEMPTS: int = 3
+    # How often each runner requeues expired leases and picks up queued tasks
+    TASK_RECOVER_SECONDS: float = 60.0
+    
+    # Archiving
+    ARCHIVE_STATUSES: List[str] = ["rejected", "withdrawn", "declined", "closed"]
+    ARCHIVE_AFTER_DAYS: int = 180
+    ARCHIVE_BATCH_SIZE: int = 500
     
     # CORS
     CORS_ORIGINS: List[str] = [
@@ -1,8 +1,9 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from sqlalchemy.orm import Session, load_only, selectinload
+from sqlalchemy import or_, select, func, literal, union_all, insert, delete
 from . import models, schemas, auth
-from typing import Tuple, List, Optional
-from datetime import datetime
+from . import suggest
+from typing import Tuple, List, Optional, Sequence
+from datetime import datetime, timedelta, timezone
 
 # User operations
 def get_user(db: Session, user_id: int):
@@ -23,6 +24,46 @@ def create_user(db: Session, user: schemas.UserCreate):
     return db_user
 
 # Job operations
+JOB_COLUMN_FIELDS = (
+    "id", "title", "company", "location", "description", "status",
+    "application_date", "created_at", "updated_at", "owner_id"
+)
+JOB_FIELDS = JOB_COLUMN_FIELDS + ("notes", "archived")
+
+def job_load_options(model, fields: Optional[Sequence[str]]) -> list:
+    """
+    Loader options that SELECT only the requested job fields.
+    With no fields, the whole row is loaded. List views pass a field list
+    without description, so only they skip the potentially large column.
+    """
+    if fields is None:
+        return []
+    columns = [getattr(model, field) for field in fields if field in JOB_COLUMN_FIELDS]
+    options = [load_only(model.id, *columns)]
+    if "notes" in fields:
+        options.append(selectinload(model.notes))
+    return options
+
+def _job_filters(
+    model,
+    user_id: int,
+    status: Optional[str] = None,
+    company: Optional[str] = None,
+    search: Optional[str] = None
+) -> list:
+    filters = [model.owner_id == user_id]
+    if status:
+        filters.append(model.status == status)
+    if company:
+        filters.append(model.company.ilike(f"%{company}%"))
+    if search:
+        filters.append(or_(
+            model.title.ilike(f"%{search}%"),
+            model.company.ilike(f"%{search}%"),
+            model.description.ilike(f"%{search}%")
+        ))
+    return filters
+
 def get_jobs(
     db: Session,
     user_id: int,
@@ -30,35 +71,96 @@ def get_jobs(
     limit: int = 10,
     status: Optional[str] = None,
     company: Optional[str] = None,
-    search: Optional[str] = None
+    search: Optional[str] = None,
+    include_archived: bool = False,
+    fields: Optional[Sequence[str]] = None
 ) -> Tuple[List[models.Job], int]:
-    query = db.query(models.Job).filter(models.Job.owner_id == user_id)
-    
-    if status:
-        query = query.filter(models.Job.status == status)
-    if company:
-        query = query.filter(models.Job.company.ilike(f"%{company}%"))
-    if search:
-        search_filter = or_(
-            models.Job.title.ilike(f"%{search}%"),
-            models.Job.company.ilike(f"%{search}%"),
-            models.Job.description.ilike(f"%{search}%")
-        )
-        query = query.filter(search_filter)
-    
-    total = query.count()
-    jobs = query.order_by(models.Job.created_at.desc()).offset(skip).limit(limit).all()
+    if include_archived:
+        return _get_jobs_with_archive(db, user_id, skip, limit, status, company, search, fields)
+
+    query = db.query(models.Job).filter(
+        *_job_filters(models.Job, user_id, status, company, search)
+    )
+    # Count without the wrapping SELECT of every column that Query.count() builds
+    total = query.with_entities(func.count(models.Job.id)).scalar()
+    jobs = (
+        query.options(*job_load_options(models.Job, fields))
+        .order_by(models.Job.created_at.desc())
+        .offset(skip)
+        .limit(limit)
+        .all()
+    )
     return jobs, total
 
-def get_job(db: Session, job_id: int, user_id: int):
-    return db.query(models.Job).filter(
+def _get_jobs_with_archive(
+    db: Session,
+    user_id: int,
+    skip: int,
+    limit: int,
+    status: Optional[str],
+    company: Optional[str],
+    search: Optional[str],
+    fields: Optional[Sequence[str]]
+) -> Tuple[list, int]:
+    # Page over the ids of both tiers, then load just that page from each.
+    # Each tier contributes at most its newest skip + limit rows, read off
+    # its (owner_id, created_at) index, so the merge never sorts a whole tier
+    total = 0
+    tiers = []
+    for model, archived in ((models.Job, False), (models.ArchivedJob, True)):
+        filters = _job_filters(model, user_id, status, company, search)
+        total += db.query(func.count(model.id)).filter(*filters).scalar()
+        tiers.append(select(
+            select(model.id, model.created_at, literal(archived).label("archived"))
+            .where(*filters)
+            .order_by(model.created_at.desc())
+            .limit(skip + limit)
+            .subquery()
+        ))
+    combined = union_all(*tiers).subquery()
+
+    page = db.execute(
+        select(combined.c.id, combined.c.archived)
+        .order_by(combined.c.created_at.desc())
+        .offset(skip)
+        .limit(limit)
+    ).all()
+
+    hot_ids = [row.id for row in page if not row.archived]
+    cold_ids = [row.id for row in page if row.archived]
+    loaded = {}
+    if hot_ids:
+        for job in db.query(models.Job).options(
+            *job_load_options(models.Job, fields)
+        ).filter(models.Job.id.in_(hot_ids)):
+            loaded[(job.id, False)] = job
+    if cold_ids:
+        for job in db.query(models.ArchivedJob).options(
+            *job_load_options(models.ArchivedJob, fields)
+        ).filter(models.ArchivedJob.id.in_(cold_ids)):
+            loaded[(job.id, True)] = job
+    jobs = [loaded[(row.id, bool(row.archived))] for row in page]
+    return jobs, total
+
+def get_job(db: Session, job_id: int, user_id: int, fields: Optional[Sequence[str]] = None):
+    return db.query(models.Job).options(*job_load_options(models.Job, fields)).filter(
         models.Job.id == job_id,
         models.Job.owner_id == user_id
     ).first()
 
+def suggest_job_values(
+    db: Session,
+    user_id: int,
+    field: str,
+    prefix: str = "",
+    limit: int = 10
+) -> List[str]:
+    return suggest.suggest(db, user_id, field, prefix, limit)
+
 def create_job(db: Session, job: schemas.JobCreate, user_id: int):
     db_job = models.Job(**job.model_dump(), owner_id=user_id)
     db.add(db_job)
+    suggest.record_job(db, user_id, suggest.suggest_values(db_job), 1)
     db.commit()
     db.refresh(db_job)
     return db_job
@@ -66,8 +168,10 @@ def create_job(db: Session, job: schemas.JobCreate, user_id: int):
 def update_job(db: Session, job_id: int, job: schemas.JobCreate, user_id: int):
     db_job = get_job(db, job_id, user_id)
     if db_job:
+        suggest.record_job(db, user_id, suggest.suggest_values(db_job), -1)
         for key, value in job.model_dump().items():
             setattr(db_job, key, value)
+        suggest.record_job(db, user_id, suggest.suggest_values(db_job), 1)
         db.commit()
         db.refresh(db_job)
     return db_job
@@ -75,6 +179,7 @@ def update_job(db: Session, job_id: int, job: schemas.JobCreate, user_id: int):
 def delete_job(db: Session, job_id: int, user_id: int) -> bool:
     db_job = get_job(db, job_id, user_id)
     if db_job:
+        suggest.record_job(db, user_id, suggest.suggest_values(db_job), -1)
         db.delete(db_job)
         db.commit()
         return True
@@ -114,4 +219,140 @@ def delete_job_note(db: Session, note_id: int):
         db.delete(db_note)
         db.commit()
         return True
-    return False 
\ No newline at end of file
+    return False 
+
+def delete_orphan_notes(db: Session) -> int:
+    """
+    Delete notes whose job no longer exists. Deleting a job cascades to its
+    notes, but rows written before that cascade existed can be orphaned.
+    """
+    job_ids = db.query(models.Job.id)
+    deleted = db.query(models.JobNote).filter(
+        or_(models.JobNote.job_id.is_(None), models.JobNote.job_id.notin_(job_ids))
+    ).delete(synchronize_session=False)
+    db.commit()
+    return deleted
+
+# Archive operations
+class JobIdConflict(Exception):
+    pass
+
+def _move_jobs(db: Session, source, target, source_note, target_note, job_ids: List[int], extra: dict):
+    """Copy jobs and their notes between tiers with INSERT ... SELECT, then delete the source rows."""
+    job_columns = [c.name for c in target.__table__.columns if c.name not in extra]
+    note_columns = [c.name for c in target_note.__table__.columns]
+    db.execute(insert(target.__table__).from_select(
+        job_columns + list(extra),
+        select(*[source.__table__.c[c] for c in job_columns], *[literal(v) for v in extra.values()])
+        .where(source.id.in_(job_ids))
+    ))
+    db.execute(insert(target_note.__table__).from_select(
+        note_columns,
+        select(*[source_note.__table__.c[c] for c in note_columns])
+        .where(source_note.job_id.in_(job_ids))
+    ))
+    db.execute(delete(source_note.__table__).where(source_note.job_id.in_(job_ids)))
+    db.execute(delete(source.__table__).where(source.id.in_(job_ids)))
+
+def archive_jobs(db: Session, job_ids: List[int]) -> int:
+    """Move the given hot jobs and their notes into the archive tables."""
+    if not job_ids:
+        return 0
+    rows = db.query(models.Job.id, models.Job.owner_id, models.Job.title, models.Job.company).filter(
+        models.Job.id.in_(job_ids)
+    ).all()
+    _move_jobs(
+        db,
+        models.Job, models.ArchivedJob,
+        models.JobNote, models.ArchivedJobNote,
+        [row.id for row in rows],
+        {"archived_at": datetime.now(timezone.utc)}
+    )
+    suggest.record_jobs(db, [row._asdict() for row in rows], -1)
+    db.commit()
+    return len(rows)
+
+def archive_closed_jobs(
+    db: Session,
+    older_than_days: int,
+    statuses: List[str],
+    batch_size: int = 500,
+    user_id: Optional[int] = None
+) -> int:
+    """
+    Archive closed jobs that have not changed for older_than_days, for one
+    user or, with user_id=None, for everyone.
+    Runs in batches of batch_size, committing after each one, so writers
+    are never blocked behind a single long transaction. Each batch resumes
+    after the last id seen, so no batch re-reads rows earlier ones skipped.
+    """
+    if older_than_days < 1:
+        raise ValueError("older_than_days must be at least 1")
+    cutoff = datetime.now(timezone.utc) - timedelta(days=older_than_days)
+    last_changed = func.coalesce(models.Job.updated_at, models.Job.created_at)
+    filters = [models.Job.status.in_(statuses), last_changed < cutoff]
+    if user_id is not None:
+        filters.append(models.Job.owner_id == user_id)
+    archived = 0
+    last_id = 0
+    while True:
+        job_ids = [row.id for row in db.query(models.Job.id).filter(
+            *filters,
+            models.Job.id > last_id
+        ).order_by(models.Job.id).limit(batch_size)]
+        if not job_ids:
+            return archived
+        last_id = job_ids[-1]
+        archived += archive_jobs(db, job_ids)
+
+def get_archived_job(db: Session, job_id: int, user_id: int):
+    return db.query(models.ArchivedJob).filter(
+        models.ArchivedJob.id == job_id,
+        models.ArchivedJob.owner_id == user_id
+    ).first()
+
+def archive_job(db: Session, job_id: int, user_id: int):
+    if get_job(db, job_id, user_id) is None:
+        return None
+    archive_jobs(db, [job_id])
+    return get_archived_job(db, job_id, user_id)
+
+def unarchive_job(db: Session, job_id: int, user_id: int):
+    db_job = get_archived_job(db, job_id, user_id)
+    if db_job is None:
+        return None
+    # Databases created before jobs used AUTOINCREMENT may have handed the
+    # archived job's id to a new job
+    if db.query(models.Job.id).filter(models.Job.id == job_id).first() is not None:
+        raise JobIdConflict(f"Job id {job_id} is already in use")
+    _move_jobs(
+        db,
+        models.ArchivedJob, models.Job,
+        models.ArchivedJobNote, models.JobNote,
+        [job_id],
+        {}
+    )
+    suggest.record_job(db, user_id, suggest.suggest_values(db_job), 1)
+    db.commit()
+    return get_job(db, job_id, user_id)
+
+# Background task operations
+def get_task(db: Session, task_id: int, user_id: int):
+    return db.query(models.Task).filter(
+        models.Task.id == task_id,
+        models.Task.owner_id == user_id
+    ).first()
+
+def create_task(db: Session, task: schemas.TaskCreate, user_id: int):
+    db_task = models.Task(type=task.type, params=task.params, status="queued", owner_id=user_id)
+    db.add(db_task)
+    db.commit()
+    db.refresh(db_task)
+    return db_task
+
+def fail_task(db: Session, db_task: models.Task, error: str):
+    db_task.status = "failed"
+    db_task.error = error
+    db.commit()
+    db.refresh(db_task)
+    return db_task
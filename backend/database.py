@@ -1,10 +1,16 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, text
+from alembic import command as alembic_command
+from alembic.config import Config as AlembicConfig
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, scoped_session
-from sqlalchemy.pool import QueuePool
-from contextlib import contextmanager
+from sqlalchemy.orm import Session, sessionmaker
+from fastapi import HTTPException, status
+from fastapi.exceptions import RequestValidationError
+from sqlalchemy.pool import QueuePool, StaticPool
 import logging
 import os
+import threading
 from dotenv import load_dotenv
 
 from .config import settings
@@ -15,40 +21,191 @@ load_dotenv()
 
 SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./job_tracker.db")
 
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def is_sqlite_url(url: str) -> bool:
+    return url.startswith("sqlite")
+
+def _is_memory_sqlite(url: str) -> bool:
+    return url in ("sqlite://", "sqlite:///:memory:") or "mode=memory" in url
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """
+    Apply the production SQLite profile to every new DBAPI connection.
+    WAL lets readers proceed while a write is in progress, and NORMAL
+    synchronous only fsyncs at checkpoints instead of on every commit.
+    """
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+        cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+        # A negative cache_size is interpreted by SQLite as KiB rather than pages
+        cursor.execute(f"PRAGMA cache_size=-{int(settings.SQLITE_CACHE_SIZE_KB)}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+    finally:
+        cursor.close()
+
+def create_db_engine(url: str = None, **overrides):
+    """
+    Create an engine with a backend-aware profile.
+    SQLite gets WAL pragmas and a fixed-size pool (no overflow connections,
+    which would be opened and thrown away with a cold page cache); other
+    backends keep the generic QueuePool settings.
+    """
+    url = url or settings.DATABASE_URL
+    if is_sqlite_url(url):
+        options = {
+            "connect_args": {
+                "check_same_thread": False,
+                "timeout": settings.SQLITE_BUSY_TIMEOUT_MS / 1000,
+            },
+            "echo": settings.SQL_ECHO,
+        }
+        if _is_memory_sqlite(url):
+            # Every connection to :memory: is a separate database, so share one
+            options["poolclass"] = StaticPool
+        else:
+            options.update(
+                poolclass=QueuePool,
+                pool_size=settings.DB_POOL_SIZE,
+                max_overflow=0,
+                pool_timeout=settings.DB_POOL_TIMEOUT,
+                pool_recycle=-1,  # Local file handles do not go stale
+            )
+        options.update(overrides)
+        sqlite_engine = create_engine(url, **options)
+        if not _is_memory_sqlite(url):
+            event.listen(sqlite_engine, "connect", _set_sqlite_pragmas)
+        return sqlite_engine
+
+    options = {
+        "poolclass": QueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,  # Recycle connections after 30 minutes
+        "pool_pre_ping": True,
+        "echo": settings.SQL_ECHO,
+    }
+    options.update(overrides)
+    return create_engine(url, **options)
+
+class DatabaseBusyError(HTTPException):
+    """Raised when a write cannot get the SQLite writer slot in time; served as 503."""
+
+    def __init__(self, retry_after: int = 1):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="The database is busy, try again shortly",
+            headers={"Retry-After": str(retry_after)}
+        )
+
+# Single process-wide writer slot for SQLite. SQLite only ever allows one
+# writer, so queueing writers here is cheaper than letting them spin on
+# "database is locked" inside busy_timeout.
+_sqlite_write_lock = threading.Lock()
+
+class SerializedWriteSession(Session):
+    """
+    Session that holds the process-wide SQLite writer slot from its first
+    flush until the transaction ends.
+    """
+    _write_lock = _sqlite_write_lock
+
+    def _acquire_writer(self):
+        if self.info.get("holds_write_lock"):
+            return
+        timeout = settings.SQLITE_BUSY_TIMEOUT_MS / 1000
+        if not self._write_lock.acquire(timeout=timeout):
+            raise DatabaseBusyError()
+        self.info["holds_write_lock"] = True
+
+    def _release_writer(self):
+        if self.info.pop("holds_write_lock", False):
+            self._write_lock.release()
+
+    def execute(self, statement, *args, **kwargs):
+        # Bulk INSERT/UPDATE/DELETE statements write without going through flush
+        if getattr(statement, "is_dml", False):
+            self._acquire_writer()
+        return super().execute(statement, *args, **kwargs)
+
+    def flush(self, objects=None):
+        if self.new or self.dirty or self.deleted:
+            self._acquire_writer()
+        super().flush(objects)
+
+    def commit(self):
+        try:
+            super().commit()
+        finally:
+            self._release_writer()
+
+    def rollback(self):
+        try:
+            super().rollback()
+        finally:
+            self._release_writer()
+
+    def close(self):
+        try:
+            super().close()
+        finally:
+            self._release_writer()
+
+def session_class_for(url: str):
+    if is_sqlite_url(url) and settings.SQLITE_SERIALIZE_WRITES:
+        return SerializedWriteSession
+    return Session
+
 # Configure the database engine with connection pooling
-engine = create_engine(
-    settings.DATABASE_URL,
-    poolclass=QueuePool,
-    pool_size=5,
-    max_overflow=10,
-    pool_timeout=30,
-    pool_recycle=1800,  # Recycle connections after 30 minutes
-    echo=settings.SQL_ECHO
-)
+engine = create_db_engine()
 
 # Create a thread-safe session factory
 SessionLocal = sessionmaker(
+    class_=session_class_for(settings.DATABASE_URL),
     autocommit=False,
     autoflush=False,
     bind=engine
 )
 
-# Create a scoped session factory for thread safety
-db_session = scoped_session(SessionLocal)
+# Background tasks get their own small pool, so long-running tasks never
+# take connections from requests: one per task worker plus the heartbeat
+TASK_CONNECTIONS = settings.TASK_WORKERS + 1
+
+# Every connection to :memory: is a separate database, so tasks must share it
+task_engine = (
+    engine if _is_memory_sqlite(settings.DATABASE_URL)
+    else create_db_engine(pool_size=TASK_CONNECTIONS, max_overflow=0)
+)
+
+TaskSessionLocal = sessionmaker(
+    class_=session_class_for(settings.DATABASE_URL),
+    autocommit=False,
+    autoflush=False,
+    bind=task_engine
+)
 
 # Create the base class for models
 Base = declarative_base()
 
-@contextmanager
 def get_db():
     """
-    Context manager for database sessions.
+    Dependency that yields a database session.
     Ensures proper session cleanup and error handling.
     """
-    db = db_session()
+    # One session per request; FastAPI may run dependencies of concurrent
+    # requests on the same thread, so a thread-local session would be shared
+    db = SessionLocal()
     try:
         yield db
         db.commit()
+    except (HTTPException, RequestValidationError):
+        # Error responses raised by the route or its validation, not database failures
+        db.rollback()
+        raise
     except Exception as e:
         db.rollback()
         logger.error(f"Database error: {e}")
@@ -66,4 +223,54 @@ def init_db():
         logger.info("Database initialized successfully")
     except Exception as e:
         logger.error(f"Error initializing database: {e}")
-        raise 
\ No newline at end of file
+        raise 
+
+def _alembic_config() -> AlembicConfig:
+    # No ini file: the application's logging configuration stays in place
+    alembic_config = AlembicConfig()
+    alembic_config.set_main_option("script_location", os.path.join(BACKEND_DIR, "migrations"))
+    return alembic_config
+
+def check_schema(bind=None):
+    """
+    Fast startup check that the database schema is at the migration head.
+    One query against alembic_version, unlike create_all which reflects
+    every table.
+    """
+    bind = bind or engine
+    heads = set(ScriptDirectory.from_config(_alembic_config()).get_heads())
+    with bind.connect() as connection:
+        current = set(MigrationContext.configure(connection).get_current_heads())
+    if current != heads:
+        raise RuntimeError(
+            f"Database schema is at {sorted(current) or 'no revision'}, "
+            f"expected {sorted(heads)}; run 'alembic upgrade head'"
+        )
+
+def migrate(bind=None):
+    """Upgrade the database to the migration head."""
+    bind = bind or engine
+    alembic_config = _alembic_config()
+    with bind.begin() as connection:
+        alembic_config.attributes["connection"] = connection
+        alembic_command.upgrade(alembic_config, "head")
+
+def warm_pool(connections: int, bind=None) -> int:
+    """
+    Open up to `connections` pooled connections ahead of traffic, so the
+    first requests do not pay for connect() and the per-connection pragmas.
+    """
+    bind = bind or engine
+    # Asking for more than a fixed-size pool holds would block on pool_timeout
+    pool_size = getattr(bind.pool, "size", None)
+    connections = min(connections, pool_size()) if callable(pool_size) else min(connections, 1)
+    opened = []
+    try:
+        for _ in range(connections):
+            connection = bind.connect()
+            connection.execute(text("SELECT 1"))
+            opened.append(connection)
+    finally:
+        for connection in opened:
+            connection.close()
+    return len(opened)
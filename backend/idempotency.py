@@ -0,0 +1,198 @@
+from fastapi import HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta
+from typing import Any, Callable, Optional
+import hashlib
+import json
+import logging
+import random
+import time
+
+from . import models
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+REPLAY_HEADER = "Idempotent-Replayed"
+
+def request_fingerprint(scope: str, payload: Any) -> str:
+    encoded = json.dumps(
+        {"scope": scope, "payload": jsonable_encoder(payload)},
+        sort_keys=True,
+        separators=(",", ":")
+    )
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+def purge_expired(db: Session) -> int:
+    deleted = db.query(models.IdempotencyKey).filter(
+        models.IdempotencyKey.expires_at < datetime.utcnow()
+    ).delete(synchronize_session=False)
+    db.commit()
+    return deleted
+
+def pending_lease_seconds() -> float:
+    """
+    How long a pending claim is honoured before another request may take
+    the key over. A live handler can spend DB_POOL_TIMEOUT waiting for a
+    connection and SQLITE_BUSY_TIMEOUT_MS waiting for the writer slot, so
+    the lease is never shorter than twice both together.
+    """
+    slowest_handler = 2 * (settings.DB_POOL_TIMEOUT + settings.SQLITE_BUSY_TIMEOUT_MS / 1000)
+    return max(settings.IDEMPOTENCY_PENDING_LEASE_SECONDS, slowest_handler)
+
+def _get_record(db: Session, user_id: int, key: str) -> Optional[models.IdempotencyKey]:
+    return db.query(models.IdempotencyKey).filter(
+        models.IdempotencyKey.owner_id == user_id,
+        models.IdempotencyKey.key == key
+    ).first()
+
+def _claim(db: Session, user_id: int, key: str, request_hash: str) -> Optional[models.IdempotencyKey]:
+    """
+    Insert a pending record for the key.
+    Returns the record if this request owns the key, or None if another
+    request already holds it.
+    """
+    now = datetime.utcnow()
+    record = models.IdempotencyKey(
+        key=key,
+        owner_id=user_id,
+        request_hash=request_hash,
+        status="pending",
+        created_at=now,
+        expires_at=now + timedelta(seconds=settings.IDEMPOTENCY_TTL_SECONDS)
+    )
+    db.add(record)
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        return None
+    return record
+
+def _wait_for_completion(db: Session, user_id: int, key: str, request_hash: str) -> Optional[models.IdempotencyKey]:
+    """
+    Wait for the request that owns the key to finish.
+    Returns the completed record, or None if the key was released or expired
+    and may be claimed again.
+    """
+    deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+    while True:
+        record = _get_record(db, user_id, key)
+        if record is None:
+            return None
+        now = datetime.utcnow()
+        lease_expired = (
+            record.status == "pending"
+            and record.created_at < now - timedelta(seconds=pending_lease_seconds())
+        )
+        if record.expires_at < now or lease_expired:
+            # Conditional on the row we read, so a request that completes or
+            # reclaims the key in the meantime is left alone
+            db.query(models.IdempotencyKey).filter(
+                models.IdempotencyKey.id == record.id,
+                models.IdempotencyKey.status == record.status
+            ).delete(synchronize_session=False)
+            db.commit()
+            return None
+        if record.request_hash != request_hash:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Idempotency-Key was already used with a different request"
+            )
+        if record.status == "completed":
+            return record
+        if time.monotonic() >= deadline:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="A request with this Idempotency-Key is still in progress"
+            )
+        # End the transaction so the pooled connection is free while we sleep
+        # and the next poll sees fresh rows
+        db.rollback()
+        time.sleep(settings.IDEMPOTENCY_POLL_INTERVAL_SECONDS)
+
+def _complete(db: Session, record_id: int, status_code: int, body: Any):
+    updated = db.query(models.IdempotencyKey).filter(
+        models.IdempotencyKey.id == record_id,
+        models.IdempotencyKey.status == "pending"
+    ).update(
+        {"status": "completed", "status_code": status_code, "response_body": json.dumps(body)},
+        synchronize_session=False
+    )
+    db.commit()
+    if not updated:
+        # Another request decided the lease had lapsed and took the key over
+        logger.warning(
+            f"Idempotency key record {record_id} was no longer pending; its response was not stored"
+        )
+
+def _replay(record: models.IdempotencyKey) -> JSONResponse:
+    return JSONResponse(
+        status_code=record.status_code,
+        content=json.loads(record.response_body),
+        headers={REPLAY_HEADER: "true"}
+    )
+
+def run_idempotent(
+    db: Session,
+    user_id: int,
+    key: Optional[str],
+    scope: str,
+    payload: Any,
+    handler: Callable[[], Any],
+    response_model,
+    status_code: int = status.HTTP_200_OK
+):
+    """
+    Run handler at most once per (user, Idempotency-Key).
+    The first request claims the key and stores its serialized response;
+    retries replay that response without calling handler, and concurrent
+    duplicates wait for the first request to finish. If handler raises,
+    the key is released so the client can retry; a claim left pending by a
+    request that died is released after pending_lease_seconds().
+    """
+    if not key:
+        return handler()
+
+    request_hash = request_fingerprint(scope, payload)
+    while True:
+        record = _claim(db, user_id, key, request_hash)
+        if record is not None:
+            break
+        existing = _wait_for_completion(db, user_id, key, request_hash)
+        if existing is not None:
+            return _replay(existing)
+
+    try:
+        result = handler()
+    except Exception:
+        db.rollback()
+        db.query(models.IdempotencyKey).filter(
+            models.IdempotencyKey.id == record.id
+        ).delete(synchronize_session=False)
+        db.commit()
+        raise
+
+    body = jsonable_encoder(response_model.model_validate(result))
+    # The handler has already committed, so a failure here must not turn
+    # into an error response; retry once, then leave the pending claim to
+    # lapse after pending_lease_seconds()
+    for attempt in range(2):
+        try:
+            _complete(db, record.id, status_code, body)
+            break
+        except Exception as e:
+            db.rollback()
+            if attempt:
+                logger.error(f"Could not record response for Idempotency-Key {key!r}: {e}")
+
+    if random.random() < settings.IDEMPOTENCY_PURGE_SAMPLE_RATE:
+        try:
+            purge_expired(db)
+        except Exception as e:
+            logger.warning(f"Idempotency key purge failed: {e}")
+            db.rollback()
+    return body
@@ -4,13 +4,17 @@ from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.concurrency import run_in_threadpool
 import time
 import logging
+import os
 import sys
 from contextlib import asynccontextmanager
-from . import models
-from .database import engine, get_db, SessionLocal
-from .routes import router
+from sqlalchemy import text
+from . import crud, models
+from .database import engine, get_db, SessionLocal, check_schema, warm_pool
+from .routes import router, JOB_LIST_DEFAULT_FIELDS
+from .tasks import task_runner
 from .config import settings
 
 # Configure logging
@@ -24,22 +28,59 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+def warm_up(app: FastAPI):
+    """
+    Pay first-request costs before accepting traffic: build the OpenAPI
+    schema and compile the hot-path SQL into SQLAlchemy's statement cache.
+    """
+    app.openapi()
+    db = SessionLocal()
+    try:
+        crud.get_user_by_email(db, email="")
+        crud.get_jobs(db, user_id=0, fields=JOB_LIST_DEFAULT_FIELDS)
+        crud.get_job(db, job_id=0, user_id=0)
+        crud.get_job_notes(db, job_id=0)
+    finally:
+        db.close()
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
+    startup_started = time.perf_counter()
     logger.info("Starting up application...")
     try:
-        # Create database tables
-        models.Base.metadata.create_all(bind=engine)
-        logger.info("Database tables created successfully")
+        if settings.DB_STARTUP_MODE == "check":
+            check_schema()
+            logger.info("Database schema check passed")
+        else:
+            # Create database tables
+            models.Base.metadata.create_all(bind=engine)
+            logger.info("Database tables created successfully")
     except Exception as e:
-        logger.error(f"Error creating database tables: {e}")
+        logger.error(f"Error preparing database: {e}")
         raise
     
+    if settings.DB_WARM_CONNECTIONS:
+        warmed = warm_pool(settings.DB_WARM_CONNECTIONS)
+        logger.info(f"Pre-warmed {warmed} database connections")
+    if settings.WARM_STARTUP:
+        warm_up(app)
+    
+    task_runner.start()
+    
+    startup_ms = (time.perf_counter() - startup_started) * 1000
+    launched_at = os.getenv("JOB_TRACKER_LAUNCHED_AT")
+    if launched_at:
+        since_launch_ms = (time.time() - float(launched_at)) * 1000
+        logger.info(f"Worker {os.getpid()} ready: startup {startup_ms:.0f} ms, {since_launch_ms:.0f} ms since launch")
+    else:
+        logger.info(f"Application ready: startup {startup_ms:.0f} ms")
+    
     yield
     
     # Shutdown
     logger.info("Shutting down application...")
+    await run_in_threadpool(task_runner.stop, settings.TASK_DRAIN_TIMEOUT_SECONDS)
 
 app = FastAPI(
     title="Job Tracker API",
@@ -115,12 +156,12 @@ async def root():
     }
 
 @app.get("/health")
-async def health_check():
+def health_check():
+    # A plain def so FastAPI runs the blocking query in its threadpool
+    db = SessionLocal()
     try:
         # Check database connection
-        db = SessionLocal()
-        db.execute("SELECT 1")
-        db.close()
+        db.execute(text("SELECT 1"))
         return {
             "status": "healthy",
             "database": "connected",
@@ -135,4 +176,6 @@ async def health_check():
                 "error": str(e),
                 "timestamp": time.time()
             }
-        ) 
\ No newline at end of file
+        )
+    finally:
+        db.close() 
\ No newline at end of file
@@ -0,0 +1,75 @@
+"""
+Operator maintenance commands.
+
+These act on every user's data, so they are not exposed as API tasks; run
+them from a shell or a scheduler against the deployment's DATABASE_URL:
+
+    python -m backend.maintenance cleanup-orphan-notes
+    python -m backend.maintenance archive --older-than-days 180
+    python -m backend.maintenance rebuild-suggestions
+"""
+import argparse
+import logging
+
+from . import crud, suggest
+from .config import settings
+from .database import SessionLocal
+
+logger = logging.getLogger("backend.maintenance")
+
+def cleanup_orphan_notes(args) -> str:
+    db = SessionLocal()
+    try:
+        deleted = crud.delete_orphan_notes(db)
+    finally:
+        db.close()
+    return f"Deleted {deleted} orphaned notes"
+
+def archive(args) -> str:
+    db = SessionLocal()
+    try:
+        archived = crud.archive_closed_jobs(
+            db,
+            older_than_days=args.older_than_days,
+            statuses=settings.ARCHIVE_STATUSES,
+            batch_size=settings.ARCHIVE_BATCH_SIZE
+        )
+    finally:
+        db.close()
+    return f"Archived {archived} closed jobs across all users"
+
+def rebuild_suggestions(args) -> str:
+    db = SessionLocal()
+    try:
+        suggest.rebuild(db)
+    finally:
+        db.close()
+    return "Rebuilt typeahead suggestions from every user's jobs"
+
+def positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError("must be at least 1")
+    return number
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Job Tracker maintenance commands")
+    parser.add_argument("--log-level", default="info")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    cleanup = commands.add_parser("cleanup-orphan-notes", help="delete notes whose job no longer exists")
+    cleanup.set_defaults(run=cleanup_orphan_notes)
+
+    sweep = commands.add_parser("archive", help="archive every user's closed jobs")
+    sweep.add_argument("--older-than-days", type=positive_int, default=settings.ARCHIVE_AFTER_DAYS)
+    sweep.set_defaults(run=archive)
+
+    rebuild = commands.add_parser("rebuild-suggestions", help="recompute typeahead suggestions from the jobs table")
+    rebuild.set_defaults(run=rebuild_suggestions)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=args.log_level.upper(), format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    logger.info(args.run(args))
+
+if __name__ == "__main__":
+    main()
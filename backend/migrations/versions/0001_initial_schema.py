@@ -0,0 +1,244 @@
+"""Initial schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19 00:00:00
+
+Databases from before this revision were built by create_all from whatever
+the models were at the time, so every step checks what already exists and
+only adds what is missing; `alembic upgrade head` brings any of them, or an
+empty database, to the current schema.
+
+On SQLite, jobs and job_notes are rebuilt with AUTOINCREMENT. Without it
+SQLite hands the highest freed id to the next insert, so a new job could
+take the id of an archived one and the archived job could never move back.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SUGGEST_FIELDS = ("company", "title")
+
+
+def _tables():
+    return set(sa.inspect(op.get_bind()).get_table_names())
+
+
+def _columns(table):
+    return {column["name"] for column in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def _indexes(table):
+    return {index["name"] for index in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+def _create_table(name, *columns, **kwargs):
+    if name not in _tables():
+        op.create_table(name, *columns, **kwargs)
+
+
+def _create_index(name, table, columns, unique=False):
+    if name not in _indexes(table):
+        op.create_index(name, table, columns, unique=unique)
+
+
+def _create_tables():
+    _create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("email", sa.String()),
+        sa.Column("hashed_password", sa.String()),
+        sa.Column("is_active", sa.Boolean()),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True)),
+    )
+    _create_table(
+        "jobs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("title", sa.String()),
+        sa.Column("company", sa.String()),
+        sa.Column("location", sa.String()),
+        sa.Column("description", sa.Text()),
+        sa.Column("status", sa.String()),
+        sa.Column("application_date", sa.DateTime(timezone=True)),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True)),
+        sa.Column("owner_id", sa.Integer(), sa.ForeignKey("users.id")),
+        sqlite_autoincrement=True,
+    )
+    _create_table(
+        "job_notes",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("content", sa.Text()),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True)),
+        sa.Column("job_id", sa.Integer(), sa.ForeignKey("jobs.id")),
+        sqlite_autoincrement=True,
+    )
+    _create_table(
+        "archived_jobs",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=False),
+        sa.Column("title", sa.String()),
+        sa.Column("company", sa.String()),
+        sa.Column("location", sa.String()),
+        sa.Column("description", sa.Text()),
+        sa.Column("status", sa.String()),
+        sa.Column("application_date", sa.DateTime(timezone=True)),
+        sa.Column("created_at", sa.DateTime(timezone=True)),
+        sa.Column("updated_at", sa.DateTime(timezone=True)),
+        sa.Column("owner_id", sa.Integer(), sa.ForeignKey("users.id")),
+        sa.Column("archived_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    _create_table(
+        "archived_job_notes",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=False),
+        sa.Column("content", sa.Text()),
+        sa.Column("created_at", sa.DateTime(timezone=True)),
+        sa.Column("updated_at", sa.DateTime(timezone=True)),
+        sa.Column("job_id", sa.Integer(), sa.ForeignKey("archived_jobs.id")),
+    )
+    _create_table(
+        "job_suggestions",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("owner_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("field", sa.String(20), nullable=False),
+        sa.Column("key", sa.String(), nullable=False),
+        sa.Column("value", sa.String(), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.UniqueConstraint("owner_id", "field", "value", name="uq_job_suggestions_owner_field_value"),
+    )
+    _create_table(
+        "idempotency_keys",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("key", sa.String(255), nullable=False),
+        sa.Column("owner_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("request_hash", sa.String(64), nullable=False),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("status_code", sa.Integer()),
+        sa.Column("response_body", sa.Text()),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("expires_at", sa.DateTime(), nullable=False),
+        sa.UniqueConstraint("owner_id", "key", name="uq_idempotency_owner_key"),
+    )
+    _create_table(
+        "tasks",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("type", sa.String(), nullable=False),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("params", sa.JSON()),
+        sa.Column("result", sa.JSON()),
+        sa.Column("error", sa.Text()),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("started_at", sa.DateTime(timezone=True)),
+        sa.Column("heartbeat_at", sa.DateTime(timezone=True)),
+        sa.Column("finished_at", sa.DateTime(timezone=True)),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("owner_id", sa.Integer(), sa.ForeignKey("users.id")),
+    )
+    # tasks created before task leases existed
+    columns = _columns("tasks")
+    if "heartbeat_at" not in columns:
+        op.add_column("tasks", sa.Column("heartbeat_at", sa.DateTime(timezone=True)))
+    if "attempts" not in columns:
+        op.add_column("tasks", sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"))
+
+
+def _sqlite_autoincrement(bind):
+    for table, archive in (("jobs", "archived_jobs"), ("job_notes", "archived_job_notes")):
+        sql = bind.execute(
+            sa.text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {"name": table}
+        ).scalar()
+        if "AUTOINCREMENT" not in sql.upper():
+            with op.batch_alter_table(table, recreate="always", table_kwargs={"sqlite_autoincrement": True}):
+                pass
+        # Start the sequence past every id in use, archived ones included
+        highest = bind.execute(sa.text(
+            f"SELECT max(id) FROM (SELECT id FROM {table} UNION ALL SELECT id FROM {archive})"
+        )).scalar()
+        if highest is None:
+            continue
+        current = bind.execute(
+            sa.text("SELECT seq FROM sqlite_sequence WHERE name = :name"), {"name": table}
+        ).scalar()
+        if current is None:
+            bind.execute(
+                sa.text("INSERT INTO sqlite_sequence (name, seq) VALUES (:name, :seq)"),
+                {"name": table, "seq": highest}
+            )
+        elif current < highest:
+            bind.execute(
+                sa.text("UPDATE sqlite_sequence SET seq = :seq WHERE name = :name"),
+                {"name": table, "seq": highest}
+            )
+
+
+def _create_indexes():
+    _create_index("ix_users_id", "users", ["id"])
+    _create_index("ix_users_email", "users", ["email"], unique=True)
+    _create_index("ix_jobs_id", "jobs", ["id"])
+    _create_index("ix_jobs_title", "jobs", ["title"])
+    _create_index("ix_jobs_company", "jobs", ["company"])
+    _create_index("ix_jobs_owner_id_created_at", "jobs", ["owner_id", "created_at"])
+    _create_index("ix_jobs_owner_id_status_created_at", "jobs", ["owner_id", "status", "created_at"])
+    _create_index("ix_jobs_owner_id_company", "jobs", ["owner_id", "company"])
+    _create_index("ix_job_notes_id", "job_notes", ["id"])
+    _create_index("ix_job_notes_job_id_created_at", "job_notes", ["job_id", "created_at"])
+    # Superseded by the (owner_id, created_at) index
+    if "ix_archived_jobs_owner_id" in _indexes("archived_jobs"):
+        op.drop_index("ix_archived_jobs_owner_id", table_name="archived_jobs")
+    _create_index("ix_archived_jobs_owner_id_created_at", "archived_jobs", ["owner_id", "created_at"])
+    _create_index("ix_archived_job_notes_job_id", "archived_job_notes", ["job_id"])
+    _create_index("ix_job_suggestions_owner_field_key", "job_suggestions", ["owner_id", "field", "key"])
+    _create_index("ix_idempotency_keys_id", "idempotency_keys", ["id"])
+    _create_index("ix_idempotency_keys_expires_at", "idempotency_keys", ["expires_at"])
+    _create_index("ix_tasks_id", "tasks", ["id"])
+    _create_index("ix_tasks_status", "tasks", ["status"])
+    _create_index("ix_tasks_owner_id", "tasks", ["owner_id"])
+
+
+def _backfill_suggestions(bind):
+    # Always rebuilt from jobs: a database that ran under create_all may
+    # already hold rows, but only for jobs created after the table appeared
+    bind.execute(sa.text("DELETE FROM job_suggestions"))
+    suggestions = sa.table(
+        "job_suggestions",
+        sa.column("owner_id"), sa.column("field"), sa.column("key"), sa.column("value"), sa.column("count")
+    )
+    for field in SUGGEST_FIELDS:
+        rows = bind.execute(sa.text(
+            f"SELECT owner_id, {field}, count(*) FROM jobs "
+            f"WHERE owner_id IS NOT NULL AND {field} IS NOT NULL AND {field} != '' "
+            f"GROUP BY owner_id, {field}"
+        )).all()
+        if rows:
+            # Keys are casefolded in Python, as backend.suggest does; SQL lower() is ASCII-only on SQLite
+            op.bulk_insert(suggestions, [
+                {"owner_id": owner_id, "field": field, "key": value.casefold(), "value": value, "count": count}
+                for owner_id, value, count in rows
+            ])
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    _create_tables()
+    if bind.dialect.name == "sqlite":
+        _sqlite_autoincrement(bind)
+    _create_indexes()
+    _backfill_suggestions(bind)
+
+
+def downgrade() -> None:
+    for table in (
+        "tasks", "idempotency_keys", "job_suggestions", "archived_job_notes",
+        "archived_jobs", "job_notes", "jobs", "users",
+    ):
+        op.drop_table(table)
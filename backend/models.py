@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, DateTime, Text
+from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, DateTime, Text, UniqueConstraint, JSON, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .database import Base
@@ -17,6 +17,16 @@ class User(Base):
 
 class Job(Base):
     __tablename__ = "jobs"
+    __table_args__ = (
+        # Serves get_jobs: owner filter plus the created_at ordering
+        Index("ix_jobs_owner_id_created_at", "owner_id", "created_at"),
+        # Status filter (counted and paged without touching other statuses)
+        Index("ix_jobs_owner_id_status_created_at", "owner_id", "status", "created_at"),
+        # Covers the company substring filter's count, so it never reads table rows
+        Index("ix_jobs_owner_id_company", "owner_id", "company"),
+        # Never reuse ids: archived jobs keep theirs and must be able to move back
+        {"sqlite_autoincrement": True},
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, index=True)
@@ -30,10 +40,14 @@ class Job(Base):
     owner_id = Column(Integer, ForeignKey("users.id"))
 
     owner = relationship("User", back_populates="jobs")
-    notes = relationship("JobNote", back_populates="job")
+    notes = relationship("JobNote", back_populates="job", cascade="all, delete-orphan")
 
 class JobNote(Base):
     __tablename__ = "job_notes"
+    __table_args__ = (
+        Index("ix_job_notes_job_id_created_at", "job_id", "created_at"),
+        {"sqlite_autoincrement": True},
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     content = Column(Text)
@@ -41,4 +55,83 @@ class JobNote(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     job_id = Column(Integer, ForeignKey("jobs.id"))
 
-    job = relationship("Job", back_populates="notes") 
\ No newline at end of file
+    job = relationship("Job", back_populates="notes") 
+
+class ArchivedJob(Base):
+    """Closed or old jobs moved out of the hot jobs table; ids are preserved."""
+    __tablename__ = "archived_jobs"
+    __table_args__ = (
+        Index("ix_archived_jobs_owner_id_created_at", "owner_id", "created_at"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    title = Column(String)
+    company = Column(String)
+    location = Column(String)
+    description = Column(Text)
+    status = Column(String)
+    application_date = Column(DateTime(timezone=True))
+    created_at = Column(DateTime(timezone=True))
+    updated_at = Column(DateTime(timezone=True))
+    owner_id = Column(Integer, ForeignKey("users.id"))
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    notes = relationship("ArchivedJobNote", back_populates="job")
+
+    archived = True
+
+class ArchivedJobNote(Base):
+    __tablename__ = "archived_job_notes"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    content = Column(Text)
+    created_at = Column(DateTime(timezone=True))
+    updated_at = Column(DateTime(timezone=True))
+    job_id = Column(Integer, ForeignKey("archived_jobs.id"), index=True)
+
+    job = relationship("ArchivedJob", back_populates="notes")
+
+class JobSuggestion(Base):
+    """Sorted distinct company/title values per user, backing the typeahead."""
+    __tablename__ = "job_suggestions"
+    __table_args__ = (
+        UniqueConstraint("owner_id", "field", "value", name="uq_job_suggestions_owner_field_value"),
+        Index("ix_job_suggestions_owner_field_key", "owner_id", "field", "key"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    field = Column(String(20), nullable=False)  # "company" or "title"
+    key = Column(String, nullable=False)  # casefolded value, for prefix matching
+    value = Column(String, nullable=False)
+    count = Column(Integer, nullable=False, default=0)
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (UniqueConstraint("owner_id", "key", name="uq_idempotency_owner_key"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    key = Column(String(255), nullable=False)
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    request_hash = Column(String(64), nullable=False)
+    status = Column(String, nullable=False, default="pending")  # "pending" or "completed"
+    status_code = Column(Integer)
+    response_body = Column(Text)
+    created_at = Column(DateTime, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+class Task(Base):
+    __tablename__ = "tasks"
+
+    id = Column(Integer, primary_key=True, index=True)
+    type = Column(String, nullable=False)
+    status = Column(String, nullable=False, default="queued", index=True)  # "queued", "running", "succeeded", "failed"
+    params = Column(JSON)
+    result = Column(JSON)
+    error = Column(Text)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True))
+    heartbeat_at = Column(DateTime(timezone=True))
+    finished_at = Column(DateTime(timezone=True))
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    owner_id = Column(Integer, ForeignKey("users.id"), index=True)
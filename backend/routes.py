@@ -1,9 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Header
+from fastapi.encoders import jsonable_encoder
 from fastapi.security import OAuth2PasswordRequestForm
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import timedelta
 from . import crud, models, schemas, auth
+from .idempotency import run_idempotent
+from .tasks import TASK_HANDLERS, TaskQueueFull, task_runner, validate_params
 from .database import get_db
 from .config import settings
 import logging
@@ -13,7 +17,7 @@ router = APIRouter()
 
 # Authentication routes
 @router.post("/token", response_model=schemas.Token)
-async def login_for_access_token(
+def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: Session = Depends(get_db)
 ):
@@ -30,6 +34,8 @@ async def login_for_access_token(
             data={"sub": user.email}, expires_delta=access_token_expires
         )
         return {"access_token": access_token, "token_type": "bearer"}
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Login error: {str(e)}")
         raise HTTPException(
@@ -44,6 +50,8 @@ def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
         if db_user:
             raise HTTPException(status_code=400, detail="Email already registered")
         return crud.create_user(db=db, user=user)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"User creation error: {str(e)}")
         raise HTTPException(
@@ -55,11 +63,22 @@ def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
 @router.post("/jobs/", response_model=schemas.Job)
 def create_job(
     job: schemas.JobCreate,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(auth.get_current_active_user)
 ):
     try:
-        return crud.create_job(db=db, job=job, user_id=current_user.id)
+        return run_idempotent(
+            db,
+            user_id=current_user.id,
+            key=idempotency_key,
+            scope="POST /jobs/",
+            payload=job,
+            handler=lambda: crud.create_job(db=db, job=job, user_id=current_user.id),
+            response_model=schemas.Job
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Job creation error: {str(e)}")
         raise HTTPException(
@@ -67,17 +86,45 @@ def create_job(
             detail="An error occurred while creating the job"
         )
 
-@router.get("/jobs/", response_model=schemas.JobList)
+# List views leave out the potentially large description unless asked for it
+JOB_LIST_DEFAULT_FIELDS = tuple(field for field in crud.JOB_FIELDS if field != "description")
+
+FIELDS_QUERY_DESCRIPTION = f"Comma-separated job fields to return: {', '.join(crud.JOB_FIELDS)}"
+
+def _parse_fields(fields: Optional[str], default: Optional[tuple]) -> Optional[tuple]:
+    if not fields:
+        return default
+    requested = tuple(dict.fromkeys(field.strip() for field in fields.split(",") if field.strip()))
+    unknown = [field for field in requested if field not in crud.JOB_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown job fields: {', '.join(unknown)}")
+    return requested
+
+def _project_job(job, fields: tuple) -> dict:
+    data = {}
+    for field in fields:
+        if field == "notes":
+            data["notes"] = [schemas.JobNote.model_validate(note) for note in job.notes]
+        elif field == "archived":
+            data["archived"] = getattr(job, "archived", False)
+        else:
+            data[field] = getattr(job, field)
+    return data
+
+@router.get("/jobs/", response_model=schemas.JobFieldsList, response_model_exclude_unset=True)
 def read_jobs(
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
     status: Optional[str] = None,
     company: Optional[str] = None,
     search: Optional[str] = None,
+    include_archived: bool = False,
+    fields: Optional[str] = Query(None, description=FIELDS_QUERY_DESCRIPTION),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(auth.get_current_active_user)
 ):
     try:
+        selected = _parse_fields(fields, JOB_LIST_DEFAULT_FIELDS)
         jobs, total = crud.get_jobs(
             db,
             user_id=current_user.id,
@@ -85,15 +132,19 @@ def read_jobs(
             limit=limit,
             status=status,
             company=company,
-            search=search
+            search=search,
+            include_archived=include_archived,
+            fields=selected
         )
         return {
-            "items": jobs,
+            "items": [_project_job(job, selected) for job in jobs],
             "total": total,
             "page": skip // limit + 1,
             "size": limit,
             "pages": (total + limit - 1) // limit
         }
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Job listing error: {str(e)}")
         raise HTTPException(
@@ -101,17 +152,45 @@ def read_jobs(
             detail="An error occurred while fetching jobs"
         )
 
-@router.get("/jobs/{job_id}", response_model=schemas.Job)
+@router.get("/jobs/suggest", response_model=schemas.JobSuggestions)
+def suggest_jobs(
+    field: str = Query(..., pattern="^(company|title)$"),
+    prefix: str = Query("", max_length=100),
+    limit: int = Query(settings.SUGGEST_DEFAULT_LIMIT, ge=1, le=50),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_active_user)
+):
+    try:
+        items = crud.suggest_job_values(
+            db,
+            user_id=current_user.id,
+            field=field,
+            prefix=prefix,
+            limit=limit
+        )
+        return {"field": field, "prefix": prefix, "items": items}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Job suggestion error: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An error occurred while fetching suggestions"
+        )
+
+@router.get("/jobs/{job_id}", response_model=schemas.JobFields, response_model_exclude_unset=True)
 def read_job(
     job_id: int,
+    fields: Optional[str] = Query(None, description=FIELDS_QUERY_DESCRIPTION),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(auth.get_current_active_user)
 ):
     try:
-        db_job = crud.get_job(db, job_id=job_id, user_id=current_user.id)
+        selected = _parse_fields(fields, None)
+        db_job = crud.get_job(db, job_id=job_id, user_id=current_user.id, fields=selected)
         if db_job is None:
             raise HTTPException(status_code=404, detail="Job not found")
-        return db_job
+        return _project_job(db_job, selected or crud.JOB_FIELDS)
     except HTTPException:
         raise
     except Exception as e:
@@ -162,19 +241,73 @@ def delete_job(
             detail="An error occurred while deleting the job"
         )
 
+@router.post("/jobs/{job_id}/archive", response_model=schemas.Job)
+def archive_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_active_user)
+):
+    try:
+        db_job = crud.archive_job(db, job_id=job_id, user_id=current_user.id)
+        if db_job is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+        return db_job
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Job archive error: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An error occurred while archiving the job"
+        )
+
+@router.post("/jobs/{job_id}/unarchive", response_model=schemas.Job)
+def unarchive_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_active_user)
+):
+    try:
+        db_job = crud.unarchive_job(db, job_id=job_id, user_id=current_user.id)
+        if db_job is None:
+            raise HTTPException(status_code=404, detail="Archived job not found")
+        return db_job
+    except crud.JobIdConflict as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Job unarchive error: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An error occurred while unarchiving the job"
+        )
+
 # Job Note routes
 @router.post("/jobs/{job_id}/notes/", response_model=schemas.JobNote)
 def create_job_note(
     job_id: int,
     note: schemas.JobNoteCreate,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(auth.get_current_active_user)
 ):
-    try:
+    def create():
         job = crud.get_job(db, job_id=job_id, user_id=current_user.id)
         if not job:
             raise HTTPException(status_code=404, detail="Job not found")
         return crud.create_job_note(db=db, note=note, job_id=job_id)
+
+    try:
+        return run_idempotent(
+            db,
+            user_id=current_user.id,
+            key=idempotency_key,
+            scope=f"POST /jobs/{job_id}/notes/",
+            payload=note,
+            handler=create,
+            response_model=schemas.JobNote
+        )
     except HTTPException:
         raise
     except Exception as e:
@@ -211,4 +344,60 @@ def read_job_notes(
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="An error occurred while fetching notes"
-        ) 
\ No newline at end of file
+        ) 
+
+# Background task routes
+@router.post("/tasks/", response_model=schemas.Task, status_code=status.HTTP_202_ACCEPTED)
+def create_task(
+    task: schemas.TaskCreate,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_active_user)
+):
+    if task.type not in TASK_HANDLERS:
+        raise HTTPException(status_code=400, detail=f"Unknown task type: {task.type}")
+    try:
+        task.params = validate_params(task.type, task.params)
+    except ValidationError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=jsonable_encoder(e.errors(include_url=False))
+        )
+    try:
+        db_task = crud.create_task(db=db, task=task, user_id=current_user.id)
+        try:
+            task_runner.submit(db_task.id, db_task.type)
+        except TaskQueueFull:
+            crud.fail_task(db, db_task, "Task queue is full")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Task queue is full, try again later"
+            )
+        return db_task
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Task creation error: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An error occurred while creating the task"
+        )
+
+@router.get("/tasks/{task_id}", response_model=schemas.Task)
+def read_task(
+    task_id: int,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_active_user)
+):
+    try:
+        db_task = crud.get_task(db, task_id=task_id, user_id=current_user.id)
+        if db_task is None:
+            raise HTTPException(status_code=404, detail="Task not found")
+        return db_task
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Task retrieval error: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An error occurred while fetching the task"
+        )
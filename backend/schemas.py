@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr, Field
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from datetime import datetime
 
 # Base schemas
@@ -43,10 +43,26 @@ class Job(JobBase):
     updated_at: Optional[datetime] = None
     owner_id: int
     notes: List[JobNote] = []
+    archived: bool = False
 
     class Config:
         from_attributes = True
 
+class JobFields(BaseModel):
+    """A job restricted to the fields requested with `fields=`."""
+    id: Optional[int] = None
+    title: Optional[str] = None
+    company: Optional[str] = None
+    location: Optional[str] = None
+    description: Optional[str] = None
+    status: Optional[str] = None
+    application_date: Optional[datetime] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    owner_id: Optional[int] = None
+    notes: Optional[List[JobNote]] = None
+    archived: Optional[bool] = None
+
 class User(UserBase):
     id: int
     is_active: bool
@@ -68,9 +84,43 @@ class PaginatedResponse(BaseModel):
 class JobList(PaginatedResponse):
     items: List[Job]
 
+class JobFieldsList(PaginatedResponse):
+    items: List[JobFields]
+
 class JobNoteList(PaginatedResponse):
     items: List[JobNote]
 
+# Typeahead schemas
+class JobSuggestions(BaseModel):
+    field: str
+    prefix: str
+    items: List[str]
+
+# Background task schemas
+class TaskCreate(BaseModel):
+    type: str = Field(..., min_length=1, max_length=50)
+    params: Dict[str, Any] = {}
+
+class ArchiveJobsParams(BaseModel):
+    older_than_days: Optional[int] = Field(None, ge=1)
+
+    class Config:
+        extra = "forbid"
+
+class Task(BaseModel):
+    id: int
+    type: str
+    status: str
+    params: Optional[Dict[str, Any]] = None
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
 # Token schemas
 class Token(BaseModel):
     access_token: str
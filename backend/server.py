@@ -0,0 +1,132 @@
+"""
+Production entrypoint.
+
+Splits a global database connection budget across uvicorn worker processes,
+checks that the schema is at the migration head once instead of running
+create_all in every worker, and has each worker pre-warm its pool and hot
+paths before taking traffic.
+
+Each worker's share of the budget is split again between its request pool
+and the background task pool (one connection per task worker plus one for
+the task heartbeat), so tasks never starve requests.
+
+    python -m backend.server --workers 4 --db-connections 40
+
+Without --workers (or WEB_CONCURRENCY) it starts as many workers as the
+budget can give a full share to, up to one per CPU.
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+import uvicorn
+
+logger = logging.getLogger("backend.server")
+
+def pool_size_per_worker(workers: int, db_connections: int, task_connections: int = 0) -> int:
+    """Request pool size for each worker, after its task connections are set aside."""
+    if workers < 1:
+        raise ValueError("--workers must be at least 1")
+    per_worker = db_connections // workers
+    pool_size = per_worker - task_connections
+    if pool_size < 1:
+        raise ValueError(
+            f"A budget of {db_connections} connections gives each of {workers} workers {per_worker}, "
+            f"which leaves no request connections after {task_connections} for background tasks; "
+            f"raise --db-connections or lower --workers or --task-workers"
+        )
+    return pool_size
+
+def default_workers(db_connections: int, task_connections: int = 0) -> int:
+    """One worker per CPU, fewer if the budget cannot give each its task connections and a request connection."""
+    affordable = db_connections // (task_connections + 1)
+    return max(1, min(os.cpu_count() or 1, affordable))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the Job Tracker API with uvicorn workers")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.environ["WEB_CONCURRENCY"]) if os.getenv("WEB_CONCURRENCY") else None,
+        help="uvicorn worker processes (default: one per CPU, as many as --db-connections allows)"
+    )
+    parser.add_argument(
+        "--db-connections",
+        type=int,
+        default=int(os.getenv("DB_CONNECTION_BUDGET", "20")),
+        help="total database connections shared by all workers"
+    )
+    parser.add_argument(
+        "--task-workers",
+        type=int,
+        default=int(os.getenv("TASK_WORKERS", "2")),
+        help="background tasks each worker runs at once"
+    )
+    parser.add_argument(
+        "--migrate",
+        action="store_true",
+        help="run 'alembic upgrade head' once before starting workers"
+    )
+    parser.add_argument("--no-warm", action="store_true", help="skip connection and route pre-warming")
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=args.log_level.upper(), format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    launched_at = time.time()
+
+    if args.task_workers < 1:
+        parser.error("--task-workers must be at least 1")
+    # Matches database.TASK_CONNECTIONS: one per task worker plus the heartbeat
+    task_connections = args.task_workers + 1
+    if args.workers is None:
+        args.workers = default_workers(args.db_connections, task_connections)
+    try:
+        pool_size = pool_size_per_worker(args.workers, args.db_connections, task_connections)
+    except ValueError as e:
+        parser.error(str(e))
+
+    # Workers are spawned as fresh interpreters and build their settings from
+    # the environment, so this is how per-worker configuration reaches them
+    os.environ.update({
+        "DB_POOL_SIZE": str(pool_size),
+        "TASK_WORKERS": str(args.task_workers),
+        "DB_MAX_OVERFLOW": "0",
+        "DB_STARTUP_MODE": "check",
+        "DB_WARM_CONNECTIONS": "0" if args.no_warm else str(pool_size),
+        "WARM_STARTUP": "false" if args.no_warm else "true",
+        "JOB_TRACKER_LAUNCHED_AT": str(launched_at),
+    })
+
+    # Imported only now so the parent sees the same settings as the workers
+    from .database import engine, check_schema, migrate
+
+    try:
+        if args.migrate:
+            migrate(engine)
+        check_schema(engine)
+    except Exception as e:
+        logger.error(f"Database is not ready: {e}")
+        sys.exit(1)
+    finally:
+        engine.dispose()
+
+    per_worker = pool_size + task_connections
+    logger.info(
+        f"Starting {args.workers} workers with {per_worker} database connections each "
+        f"({pool_size} for requests, {task_connections} for background tasks; "
+        f"{per_worker * args.workers} of {args.db_connections} budgeted)"
+    )
+    uvicorn.run(
+        "backend.main:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        log_level=args.log_level,
+    )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+from collections import Counter
+from sqlalchemy import bindparam, delete, func, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from typing import Dict, Iterable, List
+
+from . import models
+
+SUGGEST_FIELDS = ("company", "title")
+
+# Sorts after every other character, so [prefix, prefix + MAX_CHAR) covers
+# every key that starts with prefix
+MAX_CHAR = "\U0010ffff"
+
+def suggest_values(job) -> Dict[str, str]:
+    return {field: getattr(job, field) for field in SUGGEST_FIELDS}
+
+def _add(db: Session, rows: List[Dict]):
+    table = models.JobSuggestion.__table__
+    dialect = db.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        dialect_insert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+        statement = dialect_insert(table)
+        db.execute(statement.on_conflict_do_update(
+            index_elements=["owner_id", "field", "value"],
+            set_={"count": table.c.count + statement.excluded.count}
+        ), rows)
+        return
+    for row in rows:
+        updated = db.execute(
+            table.update()
+            .where(table.c.owner_id == row["owner_id"], table.c.field == row["field"], table.c.value == row["value"])
+            .values(count=table.c.count + row["count"])
+        ).rowcount
+        if not updated:
+            db.execute(insert(table).values(**row))
+
+def _remove(db: Session, rows: List[Dict]):
+    table = models.JobSuggestion.__table__
+    db.execute(
+        table.update()
+        .where(
+            table.c.owner_id == bindparam("b_owner_id"),
+            table.c.field == bindparam("b_field"),
+            table.c.value == bindparam("b_value")
+        )
+        .values(count=table.c.count - bindparam("b_count")),
+        [{f"b_{name}": row[name] for name in ("owner_id", "field", "value", "count")} for row in rows]
+    )
+    owner_ids = {row["owner_id"] for row in rows}
+    db.execute(delete(table).where(table.c.owner_id.in_(owner_ids), table.c.count <= 0))
+
+def record_jobs(db: Session, jobs: Iterable[Dict[str, str]], delta: int):
+    """
+    Add (delta=1) or remove (delta=-1) jobs' company and title values.
+    Each item needs owner_id plus the SUGGEST_FIELDS. Runs in the caller's
+    transaction, so suggestions commit or roll back with the job change
+    and every worker process sees the same values.
+    """
+    counts = Counter()
+    for job in jobs:
+        for field in SUGGEST_FIELDS:
+            if job.get(field):
+                counts[(job["owner_id"], field, job[field])] += 1
+    if not counts:
+        return
+    rows = [
+        {"owner_id": user_id, "field": field, "key": value.casefold(), "value": value, "count": count * abs(delta)}
+        for (user_id, field, value), count in counts.items()
+    ]
+    if delta > 0:
+        _add(db, rows)
+    else:
+        _remove(db, rows)
+
+def record_job(db: Session, user_id: int, values: Dict[str, str], delta: int):
+    record_jobs(db, [dict(values, owner_id=user_id)], delta)
+
+def suggest(db: Session, user_id: int, field: str, prefix: str, limit: int) -> List[str]:
+    suggestion = models.JobSuggestion
+    query = db.query(suggestion.value).filter(
+        suggestion.owner_id == user_id,
+        suggestion.field == field
+    )
+    key = prefix.casefold()
+    if key:
+        query = query.filter(suggestion.key >= key, suggestion.key < key + MAX_CHAR)
+    return [value for value, in query.order_by(suggestion.key, suggestion.value).limit(limit)]
+
+def rebuild(db: Session, user_id: int = None):
+    """Recompute suggestions from the jobs table, for one user or everyone."""
+    table = models.JobSuggestion.__table__
+    cleared = delete(table)
+    if user_id is not None:
+        cleared = cleared.where(table.c.owner_id == user_id)
+    db.execute(cleared)
+    for field in SUGGEST_FIELDS:
+        column = getattr(models.Job, field)
+        rows = select(models.Job.owner_id, column, func.count()).where(column.isnot(None), column != "")
+        if user_id is not None:
+            rows = rows.where(models.Job.owner_id == user_id)
+        rows = db.execute(rows.group_by(models.Job.owner_id, column)).all()
+        if rows:
+            db.execute(insert(table), [
+                {"owner_id": owner_id, "field": field, "key": value.casefold(), "value": value, "count": count}
+                for owner_id, value, count in rows
+            ])
+    db.commit()
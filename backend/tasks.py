@@ -0,0 +1,300 @@
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+from sqlalchemy import func
+from sqlalchemy.orm import Session, selectinload
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Type
+import queue
+import threading
+import logging
+import time
+
+from . import crud, models, schemas
+from .config import settings
+from .database import TaskSessionLocal
+
+logger = logging.getLogger(__name__)
+
+TaskHandler = Callable[[Session, models.Task], Any]
+
+TASK_HANDLERS: Dict[str, TaskHandler] = {}
+
+# Optional pydantic model each task type's params must validate against
+TASK_PARAMS: Dict[str, Type[BaseModel]] = {}
+
+class TaskQueueFull(Exception):
+    pass
+
+class UnknownTaskType(Exception):
+    pass
+
+def task_handler(task_type: str, params: Optional[Type[BaseModel]] = None):
+    """
+    Register a function as the handler for a background task type.
+    Handlers only see their task's owner's data; params, if given, is the
+    model the request's params are validated against before queueing.
+    """
+    def register(func: TaskHandler) -> TaskHandler:
+        TASK_HANDLERS[task_type] = func
+        if params is not None:
+            TASK_PARAMS[task_type] = params
+        return func
+    return register
+
+def validate_params(task_type: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    """Return params normalized by the task type's model; raises pydantic.ValidationError."""
+    model = TASK_PARAMS.get(task_type)
+    if model is None:
+        return params
+    return model.model_validate(params).model_dump(exclude_none=True)
+
+# Task handlers
+@task_handler("export_jobs")
+def export_jobs(db: Session, task: models.Task):
+    items = []
+    for model in (models.Job, models.ArchivedJob):
+        jobs = (
+            db.query(model)
+            .options(selectinload(model.notes))
+            .filter(model.owner_id == task.owner_id)
+            .order_by(model.id)
+            .all()
+        )
+        items.extend(schemas.Job.model_validate(job) for job in jobs)
+    items.sort(key=lambda job: job.id)
+    return {
+        "count": len(items),
+        "items": jsonable_encoder(items)
+    }
+
+@task_handler("archive_jobs", params=schemas.ArchiveJobsParams)
+def archive_jobs(db: Session, task: models.Task):
+    params = task.params or {}
+    archived = crud.archive_closed_jobs(
+        db,
+        older_than_days=params.get("older_than_days", settings.ARCHIVE_AFTER_DAYS),
+        statuses=settings.ARCHIVE_STATUSES,
+        batch_size=settings.ARCHIVE_BATCH_SIZE,
+        user_id=task.owner_id
+    )
+    return {"archived": archived}
+
+def _utcnow():
+    return datetime.now(timezone.utc)
+
+class TaskRunner:
+    """
+    Bounded in-process runner for persisted tasks.
+    Each task type has its own queue and as many worker threads as its
+    concurrency limit; a shared semaphore caps how many tasks run at once
+    across all types. Task state lives in the tasks table, so anything
+    still queued at shutdown is picked up again by the next start().
+    Running tasks hold a lease renewed by a heartbeat thread, which also
+    (like start()) every TASK_RECOVER_SECONDS requeues tasks whose lease
+    lapsed because their process died and picks up queued tasks this
+    process does not have, so live workers take over a dead one's work.
+    """
+
+    def __init__(self, max_workers: int, type_limits: Dict[str, int], queue_size: int):
+        self.max_workers = max_workers
+        self.type_limits = type_limits
+        self.queue_size = queue_size
+        self._queues: Dict[str, "queue.Queue[Optional[int]]"] = {}
+        self._threads: List[threading.Thread] = []
+        self._slots = threading.BoundedSemaphore(max_workers)
+        self._stopping = threading.Event()
+        self._running = set()
+        # Ids sitting in this process's queues, so recovery does not add them twice
+        self._queued = set()
+        self._running_lock = threading.Lock()
+
+    def start(self):
+        if self._threads:
+            return
+        self._stopping.clear()
+        for task_type in TASK_HANDLERS:
+            self._queues[task_type] = queue.Queue(maxsize=self.queue_size)
+            for n in range(max(1, self.type_limits.get(task_type, 1))):
+                thread = threading.Thread(
+                    target=self._work,
+                    args=(task_type,),
+                    name=f"task-{task_type}-{n}",
+                    daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+        heartbeat = threading.Thread(target=self._heartbeat, name="task-heartbeat", daemon=True)
+        heartbeat.start()
+        self._threads.append(heartbeat)
+        self._recover()
+        logger.info(f"Task runner started with {len(self._threads)} threads")
+
+    def _recover(self):
+        db = TaskSessionLocal()
+        try:
+            self._expire_leases(db)
+            pending = db.query(models.Task.id, models.Task.type).filter(
+                models.Task.status == "queued"
+            ).order_by(models.Task.id).all()
+        finally:
+            db.close()
+        full = set()
+        for task_id, task_type in pending:
+            if task_type in full:
+                continue
+            try:
+                self.submit(task_id, task_type)
+            except TaskQueueFull as e:
+                # The rest stay queued in the database for a later pass
+                full.add(task_type)
+                logger.warning(f"Could not requeue task {task_id}: {e}")
+            except UnknownTaskType as e:
+                logger.warning(f"Could not requeue task {task_id}: {e}")
+
+    def _expire_leases(self, db: Session):
+        """Requeue running tasks whose heartbeat stopped, or fail them once out of attempts."""
+        last_seen = func.coalesce(models.Task.heartbeat_at, models.Task.started_at)
+        stale = (
+            models.Task.status == "running",
+            last_seen < _utcnow() - timedelta(seconds=settings.TASK_LEASE_SECONDS)
+        )
+        requeued = db.query(models.Task).filter(
+            *stale, models.Task.attempts < settings.TASK_MAX_ATTEMPTS
+        ).update({"status": "queued", "heartbeat_at": None}, synchronize_session=False)
+        failed = db.query(models.Task).filter(*stale).update(
+            {"status": "failed", "error": "Task lease expired", "finished_at": _utcnow()},
+            synchronize_session=False
+        )
+        db.commit()
+        if requeued or failed:
+            logger.warning(f"Recovered tasks with expired leases: {requeued} requeued, {failed} failed")
+
+    def _heartbeat(self):
+        recovered_at = time.monotonic()
+        while not self._stopping.wait(settings.TASK_HEARTBEAT_SECONDS):
+            with self._running_lock:
+                running = list(self._running)
+            if running:
+                self._renew_leases(running)
+            if time.monotonic() - recovered_at >= settings.TASK_RECOVER_SECONDS:
+                recovered_at = time.monotonic()
+                try:
+                    self._recover()
+                except Exception as e:
+                    logger.warning(f"Task recovery failed: {e}")
+
+    def _renew_leases(self, running: List[int]):
+        db = TaskSessionLocal()
+        try:
+            db.query(models.Task).filter(
+                models.Task.id.in_(running),
+                models.Task.status == "running"
+            ).update({"heartbeat_at": _utcnow()}, synchronize_session=False)
+            db.commit()
+        except Exception as e:
+            logger.warning(f"Task heartbeat failed: {e}")
+            db.rollback()
+        finally:
+            db.close()
+
+    def submit(self, task_id: int, task_type: str):
+        task_queue = self._queues.get(task_type)
+        if task_queue is None:
+            raise UnknownTaskType(task_type)
+        with self._running_lock:
+            if task_id in self._queued or task_id in self._running:
+                return
+            self._queued.add(task_id)
+        try:
+            task_queue.put_nowait(task_id)
+        except queue.Full:
+            with self._running_lock:
+                self._queued.discard(task_id)
+            raise TaskQueueFull(f"Queue for {task_type} is full")
+
+    def stop(self, timeout: float):
+        """
+        Stop taking new work and wait up to timeout seconds for running
+        tasks to finish. Queued tasks stay queued in the database.
+        """
+        self._stopping.set()
+        for task_type, task_queue in self._queues.items():
+            for _ in range(max(1, self.type_limits.get(task_type, 1))):
+                try:
+                    task_queue.put_nowait(None)
+                except queue.Full:
+                    pass
+        deadline = time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+        alive = [thread.name for thread in self._threads if thread.is_alive()]
+        if alive:
+            logger.warning(f"Task runner stopped with tasks still running: {alive}")
+        self._threads = []
+        self._queues = {}
+        with self._running_lock:
+            self._queued.clear()
+
+    def _work(self, task_type: str):
+        task_queue = self._queues[task_type]
+        while not self._stopping.is_set():
+            try:
+                task_id = task_queue.get(timeout=1.0)
+            except queue.Empty:
+                continue
+            if task_id is None or self._stopping.is_set():
+                break
+            with self._slots:
+                if self._stopping.is_set():
+                    break
+                self._run(task_id)
+
+    def _claim(self, db: Session, task_id: int) -> bool:
+        claimed = db.query(models.Task).filter(
+            models.Task.id == task_id,
+            models.Task.status == "queued"
+        ).update({
+            "status": "running",
+            "started_at": _utcnow(),
+            "heartbeat_at": _utcnow(),
+            "attempts": models.Task.attempts + 1
+        }, synchronize_session=False)
+        db.commit()
+        return claimed == 1
+
+    def _run(self, task_id: int):
+        db = TaskSessionLocal()
+        try:
+            # Another process may have recovered and claimed the same task
+            claimed = self._claim(db, task_id)
+            with self._running_lock:
+                self._queued.discard(task_id)
+                if claimed:
+                    self._running.add(task_id)
+            if not claimed:
+                return
+            task = db.query(models.Task).filter(models.Task.id == task_id).first()
+            try:
+                result = TASK_HANDLERS[task.type](db, task)
+                task.status = "succeeded"
+                task.result = jsonable_encoder(result)
+            except Exception as e:
+                logger.error(f"Task {task_id} ({task.type}) failed: {e}", exc_info=True)
+                db.rollback()
+                task.status = "failed"
+                task.error = str(e)
+            task.finished_at = _utcnow()
+            db.commit()
+        except Exception as e:
+            logger.error(f"Task runner error on task {task_id}: {e}")
+            db.rollback()
+        finally:
+            with self._running_lock:
+                self._running.discard(task_id)
+            db.close()
+
+task_runner = TaskRunner(
+    max_workers=settings.TASK_WORKERS,
+    type_limits=settings.TASK_TYPE_LIMITS,
+    queue_size=settings.TASK_QUEUE_MAX
+)